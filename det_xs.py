@@ -5,41 +5,93 @@ from .constants import *
 from .fmath import *
 from .photon_xs import PECrossSection
 from .matrix_element import *
+from .prod_xs import _primakoff_num
 
-from matplotlib.pyplot import hist2d
+from numba import cfunc, njit, types, vectorize, float64
+from scipy import LowLevelCallable
+
+import functools
+import math
 
 
 # Define ALP DETECTION cross-sections
 
 #### Photon Coupling ####
 
+@njit(cache=True, error_model="numpy")
+def _iprimakoff_dsigma_dtheta_kernel(theta, ea, g, ma, z, r0):
+    # scalar inverse-Primakoff diffxs by theta, shared by iprimakoff_dsigma_dtheta and the quad integrand below
+    # q2 = ma^2 - 2ea^2 + 2ea*pa*cos(theta) and 1 + beta^2 - 2beta*cos(theta) are written in sin^2(theta/2)
+    # so that neither cancels to 0 at small theta for light ALPs
+    if ea <= ma:
+        return 0.0
+    pa = math.sqrt(ea*ea - ma*ma)
+    prefactor = (g * z)**2 / (2*137)
+    sin_half2 = math.sin(theta/2)**2
+    ma2_over_sum = ma*ma/(ea + pa)
+    q2 = -ma2_over_sum**2 - 4*ea*pa*sin_half2
+    beta = pa/ea
+    one_minus_beta = ma2_over_sum/ea
+    return prefactor * math.expm1(q2 * r0**2 / 4)**2 * (beta * math.sin(theta)**3)/(one_minus_beta**2 + 4*beta*sin_half2)**2
+
+@vectorize([float64(float64, float64, float64, float64, float64, float64)], cache=True)
+def _iprimakoff_dsigma_dtheta_ufunc(theta, ea, g, ma, z, r0):
+    return _iprimakoff_dsigma_dtheta_kernel(theta, ea, g, ma, z, r0)
+
 def iprimakoff_dsigma_dtheta(theta, ea, g, ma, z, r0):
     # inverse-Primakoff scattering differential xs by theta
     # r0: screening parameter
-    if ea < ma:
-        return 0.0
-    prefactor = (g * z)**2 / (2*137)
-    q2 = -2*ea**2 + ma**2 + 2*ea*sqrt(ea**2 - ma**2)*cos(theta)
-    beta = sqrt(ea**2 - ma**2)/ea
-    return prefactor * (1 - exp(q2 * r0**2 / 4))**2 * (beta * sin(theta)**3)/(1+beta**2 - 2*beta*cos(theta))**2
+    # theta and/or ea may be arrays
+    return _iprimakoff_dsigma_dtheta_ufunc(theta, ea, g, ma, z, r0)
+
+
+
 
+@cfunc(types.float64(types.intc, types.CPointer(types.float64)), error_model="numpy")
+def _iprimakoff_dsigma_dtheta_cfunc(n, xx):
+    # compiled integrand for iprimakoff_nsigma, called by quad as f(n, [theta, ea, g, ma, z, r0])
+    return _iprimakoff_dsigma_dtheta_kernel(xx[0], xx[1], xx[2], xx[3], xx[4], xx[5])
 
+_iprimakoff_dsigma_dtheta_llc = LowLevelCallable(_iprimakoff_dsigma_dtheta_cfunc.ctypes,
+                                                 signature="double (int, double *)")
 
 
-def iprimakoff_nsigma(ea, g, ma, z, r0):
+
+
+def iprimakoff_nsigma(ea, g, ma, z, r0, use_quad=False):
     # inverse-Primakoff scattering total xs (numerically integrated)
     # r0: screening parameter
-    return quad(iprimakoff_dsigma_dtheta, 0, pi, args=(ea,g,ma,z,r0))[0]
+    # composite Gauss-Legendre in log(theta) by default; use_quad=True integrates with quad instead (for validation)
+    if ea < ma:
+        return 0.0
+    if use_quad:
+        return quad(_iprimakoff_dsigma_dtheta_llc, 0, pi, args=(ea,g,ma,z,r0))[0]
+    # the integrand falls like 1/theta down to the screening angle ~ 1/(ea*r0) and vanishes below it
+    theta, w = log_gauss_legendre_rule(1e-4/max(1.0, ea*r0), pi)
+    return np.dot(w, iprimakoff_dsigma_dtheta(theta, ea, g, ma, z, r0))
 
 
 
 
+@njit(cache=True, fastmath=True)
+def _iprimakoff_sigma_kernel(ea, g, ma, z, r0):
+    if ea <= ma:
+        return 0.0
+    prefactor = (g * z)**2 / (2*137)
+    eta2 = r0**2 * (ea**2 - ma**2)
+    return prefactor * (((2*eta2 + 1)/(4*eta2))*math.log(1+4*eta2) - 1)
+
+@vectorize([float64(float64, float64, float64, float64, float64)], fastmath=True, cache=True)
+def _iprimakoff_sigma_ufunc(ea, g, ma, z, r0):
+    return _iprimakoff_sigma_kernel(ea, g, ma, z, r0)
+
 def iprimakoff_sigma(ea, g, ma, z, r0 = 2.2e-10 / METER_BY_MEV):
     # inverse-Primakoff scattering total xs (Creswick et al)
     # r0: screening parameter
-    prefactor = (g * z)**2 / (2*137)
-    eta2 = r0**2 * (ea**2 - ma**2)
-    return heaviside(ea-ma, 0.0)*prefactor * (((2*eta2 + 1)/(4*eta2))*log(1+4*eta2) - 1)
+    # scalar calls skip the ufunc, whose dispatch costs more than the kernel itself
+    if all(isinstance(v, (float, int, np.number)) for v in (ea, g, ma, z, r0)):
+        return _iprimakoff_sigma_kernel(float(ea), float(g), float(ma), float(z), float(r0))
+    return _iprimakoff_sigma_ufunc(ea, g, ma, z, r0)
 
 
 
@@ -47,7 +99,7 @@ def iprimakoff_sigma(ea, g, ma, z, r0 = 2.2e-10 / METER_BY_MEV):
 def dark_iprim_dsigma_dt(t, s, gZN, gaGZ, ma, mZp, M):
     # inverse Priamkoff with massive vector mediator (a + N -> \gamma + N via Z')
     prefactor = (gZN*gaGZ)**2 / (16*pi) / ((M + ma)**2 - s) / ((M - ma)**2 - s)
-    return prefactor * (ma**2 * t * (M**2 + s) - (M*ma**2)**2 - t*((s-M**2)**2 + s*t) - t*(t-ma**2)/2) / (t-mZp**2)**2
+    return prefactor * _primakoff_num(t, s, ma, M) / (t-mZp**2)**2
 
 
 
@@ -64,12 +116,39 @@ def dark_iprim_dsigma_dcostheta(cosTheta, Ea, gZN, gaGZ, ma, mZp, z=6):
 
 #### Electron Coupling ####
 
+class AxioElectricSigma:
+    """
+    Axio-electric total cross section for ionization in a given material.
+    The photoelectric table is loaded once and interpolated linearly in log-log,
+    as in PECrossSection.sigma_mev; energies outside the table give zero.
+    """
+    def __init__(self, mat: Material):
+        pe_xs = PECrossSection(mat)
+        self._log_energy = log10(pe_xs.pe_data[:,0])
+        self._log_sigma_pe = log10(pe_xs.xs_dim * pe_xs.pe_data[:,1] / MEV2_CM2)
+
+    def sigma_pe_mev(self, energy):
+        return power(10, np.interp(log10(energy), self._log_energy, self._log_sigma_pe, left=-np.inf, right=-np.inf))
+
+    def __call__(self, energy, g, ma):
+        beta = sqrt(np.heaviside(energy-ma,0.0) * (energy*energy - ma*ma))/energy
+        eg_me = energy * g / M_E
+        return  np.clip(np.heaviside(1.0 - energy, 0.0) *3 * eg_me*eg_me * self.sigma_pe_mev(energy) * \
+            (1 - power(beta, 2/3)/3) / (16*pi*ALPHA*beta), a_min=0.0, a_max=None)
+
+
+
+
+@functools.lru_cache(maxsize=16)
+def _axioelectric_sigma_by_name(mat_name):
+    return AxioElectricSigma(Material(mat_name))
+
+
+
+
 def axioelectric_sigma(energy, g, ma, mat):
     # Axio-electric total cross section for ionization
-    pe_xs = PECrossSection(mat)
-    beta = sqrt(np.heaviside(energy-ma,0.0) * (energy**2 - ma**2))/energy
-    return  np.clip(np.heaviside(1.0 - energy, 0.0) *3 * power(energy * g / M_E, 2) * pe_xs.sigma_mev(energy) * \
-        (1 - power(beta, 2/3)/3) / (16*pi*ALPHA*beta), a_min=0.0, a_max=None)
+    return _axioelectric_sigma_by_name(mat.mat_name)(energy, g, ma)
 
 
 
@@ -86,18 +165,34 @@ def icompton_sigma_old(ea, g, z=1):
 
 
 
+@vectorize([float64(float64, float64, float64, float64)], fastmath=True, cache=True)
+def _icompton_sigma_ufunc(ea, ma, g, z):
+    me2 = M_E*M_E
+    ma2 = ma*ma
+    ma4 = ma2*ma2
+    if ea <= ma or ea <= ma*math.sqrt(2*me2 + ma2)/(2*M_E):
+        return 0.0
+    y = 2 * M_E * ea + ma2
+    y_plus_me2 = me2 + y
+    pa = math.sqrt((ea*ea - ma2))
+    prefactor = z * ALPHA * g*g / (8 * me2 * pa)
+
+    return prefactor * ((2 * me2 * (M_E + ea) * y)/(y_plus_me2*y_plus_me2) \
+        + (4*M_E*(ma4 + 2*ma2*me2 - 4*me2*ea*ea))/(y*y_plus_me2) \
+        + math.log((M_E + ea + pa)/(M_E + ea - pa))*(4*me2*pa*pa + ma4)/(pa*y))
+
 def icompton_sigma(ea, ma, g, z=1):
     # Inverse Compton total cross section (a + e- -> \gamma + e-)
     # Borexino 2008, eq. 14
-    y = 2 * M_E * ea + ma**2
-    pa = sqrt((ea**2 - ma**2))
-    prefactor = heaviside(ea - ma, 0.0) * heaviside(ea - ma*sqrt(2*M_E**2 + ma**2)/(2*M_E), 0.0) * z * ALPHA * power(g/M_E, 2) / (8 * pa)
+    return _icompton_sigma_ufunc(ea, ma, g, z)
+
 
-    return prefactor * ((2 * M_E**2 * (M_E + ea) * y)/power(M_E**2 + y, 2) \
-        + (4*M_E*(ma**4 + 2*power(ma*M_E, 2) - power(2*M_E*ea, 2)))/(y*(M_E**2 + y)) \
-        + log((M_E + ea + pa)/(M_E + ea - pa))*(power(2*M_E*pa, 2) + ma**4)/(pa*y)) #, a_min=0.0, a_max=None)
 
 
+def icompton_sigma_vec(ea, ma, g, z=1):
+    # Inverse Compton total cross section (a + e- -> \gamma + e-) over an array of ALP energies ea
+    return icompton_sigma(np.asarray(ea, dtype=np.float64), ma, g, z)
+
 
 
 
@@ -106,12 +201,14 @@ def icompton_dsigma_det(ea, et, g, ma, z=1):
     # dSigma / dEt   electron kinetic energy
     # ea: axion energy
     # et: transferred electron energy = E_e - m_e.
-    y = 2 * M_E * ea + ma ** 2
-    prefact = z*(1/137) * g ** 2 / (4 * M_E ** 2)
-    pa = np.sqrt(ea ** 2 - ma ** 2)
+    ma2 = ma*ma
+    y = 2 * M_E * ea + ma2
+    prefact = z*(1/137) * g*g / (4 * M_E*M_E)
+    pa = np.sqrt(ea*ea - ma2)
     eg = ea - et
-    return -(prefact / pa) * (1 - (8 * M_E * eg / y) + (12 * (M_E * eg / y) ** 2)
-                                - (32 * M_E * (pa * ma) ** 2) * eg / (3 * y ** 3))
+    r = M_E * eg / y
+    return -(prefact / pa) * (1 - 8*r + 12*r*r
+                                - (32 * M_E * pa*pa * ma2) * eg / (3 * y*y*y))
 
 
 
@@ -119,36 +216,56 @@ def icompton_dsigma_det(ea, et, g, ma, z=1):
 def icompton_dsigma_domega(theta, Ea, ma, ge, z=1):
     # Compton differential cross section by solid angle (a + e- -> \gamma + e-)
     # dSigma / dOmega
-    y = 2*M_E*Ea + ma**2
-    pa = sqrt(Ea**2 - ma**2)
+    ma2 = ma*ma
+    y = 2*M_E*Ea + ma2
+    pa = sqrt(Ea*Ea - ma2)
     e_gamma = 0.5*y/(M_E + Ea - pa*cos(theta))
+    r = M_E*e_gamma/y
+    ma_pa_sin = ma*pa*sin(theta)
+
+    prefactor = z*ge*ge * ALPHA * e_gamma / (4*pi*2*pa*M_E*M_E)
+    return prefactor * (1 + 4*r*r - 4*r - 4*M_E*e_gamma*ma_pa_sin*ma_pa_sin / (y*y*y))
+
 
-    prefactor = z*ge**2 * ALPHA * e_gamma / (4*pi*2*pa*M_E**2)
-    return prefactor * (1 + 4*(M_E*e_gamma/y)**2 - 4*M_E*e_gamma/y - 4*M_E*e_gamma*(ma*pa*sin(theta))**2 / y**3)
 
 
+@functools.lru_cache(maxsize=64)
+def _m2_pair_production(ma, mN, n, z):
+    # M2PairProduction depends only on the ALP mass and the target nucleus; reuse it across coupling scans
+    return M2PairProduction(ma, mN, n, z)
 
 
+
+
+# log10 range of the sampled lepton angles tp, tm in pair_production_sigma
+_PAIR_LOGT_RANGE = (-15, -5)
+
 def pair_production_sigma(Ea, ma, ge, mat: Material, n_samples=1000):
-    m2 = M2PairProduction(ma, mat.m[0], mat.n[0], mat.z[0])
-    
-    tp = np.random.uniform(-15, -5, n_samples)
-    tm = np.random.uniform(-15, -5, n_samples)
+    # ALP-driven pair production total xs (a + N -> e+ e- N)
+    # Quasi-MC over (log10 tp, log10 tm, phi, ep) with a scrambled Sobol sequence;
+    # n_samples is rounded up to the next power of 2 to keep the Sobol points balanced
+    m2 = _m2_pair_production(ma, mat.m[0], mat.n[0], mat.z[0])
 
-    tp = 10**tp
-    tm = 10**tm
-    mc_vol = tp * tm * (Ea - 2*M_E)*(2*pi)*(pi**2)*log(10)**2
+    u = qmc.Sobol(d=4, scramble=True).random_base2(int(np.ceil(np.log2(n_samples))))
+    n_samples = u.shape[0]
 
-    phi = np.random.uniform(0.0, 2*pi, n_samples)
-    ep = np.random.uniform(M_E, Ea - M_E, n_samples)
+    logt_lo, logt_hi = _PAIR_LOGT_RANGE
+    logt_width = logt_hi - logt_lo
+    tp = 10**(logt_lo + logt_width*u[:,0])
+    tm = 10**(logt_lo + logt_width*u[:,1])
+    phi = 2*pi*u[:,2]
+    ep = M_E + (Ea - 2*M_E)*u[:,3]
+
+    # fixed sampling box volume times the log-uniform Jacobian tp*tm*log(10)^2 of each sample
+    mc_vol = tp * tm * (Ea - 2*M_E)*(2*pi)*logt_width**2*log(10)**2
 
     p1 = sqrt(ep**2 - M_E**2)
     em = Ea - ep
     p2 = sqrt(em**2 - M_E**2)
     va = sqrt(Ea**2 - ma**2)/Ea
 
-    m2_wgts = m2.m2(Ea, ep, tp, tm, phi, coupling_product=ge)
-
-    weights = abs(mc_vol * m2_wgts * (p1*p2*sin(tp)*sin(tm)/(512*pi**4)/Ea/va/mat.m[0]**2)/n_samples)
+    m2_wgts = m2.m2(Ea, ep, tp, tm, phi, coupling=ge)
 
-    return np.sum(weights)
\ No newline at end of file
+    # fold every scalar factor into one constant before touching the sample arrays
+    const = 1/(512*pi**4)/Ea/va/mat.m[0]**2/n_samples
+    return const * np.sum(np.abs(mc_vol * m2_wgts * p1*p2*sin(tp)*sin(tm)))
\ No newline at end of file
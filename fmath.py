@@ -1,11 +1,14 @@
 # Useful math and helper functions
 
+import functools
+import multiprocessing as multi
+
 import numpy as np
 from numpy import log, log10, exp, pi, sqrt, power, \
     sin, cos, tan, arccos, arctan, arcsin, arctan2, heaviside, dot, cross
 from scipy.integrate import quad, dblquad
 from scipy.special import exp1, erf, gamma
-from scipy.stats import norm, chisquare, expon
+from scipy.stats import norm, chisquare, expon, qmc
 
 
 
@@ -24,5 +27,38 @@ def fastMC2D(func, a, b, c, d, n_samples):
 
 
 
+@functools.lru_cache(maxsize=8)
+def _leggauss(n):
+    # n-point Gauss-Legendre nodes and weights on [-1, 1], tabulated once per n
+    return np.polynomial.legendre.leggauss(n)
+
+def log_gauss_legendre_rule(a, b, n=16, panels_per_decade=1):
+    # Composite Gauss-Legendre nodes and weights on [a, b], 0 < a < b, with panels evenly spaced in log(x)
+    # Integrands spread over many decades (e.g. ~1/x tails) get the same resolution in every decade
+    # Weights include the Jacobian dx = x du, so sum(w * f(x)) approximates the integral of f over [a, b]
+    gl_x, gl_w = _leggauss(n)
+    n_panels = max(1, int(np.ceil(panels_per_decade * log10(b / a))))
+    edges = np.linspace(log(a), log(b), n_panels + 1)
+    half = 0.5*(edges[1:] - edges[:-1])[:, np.newaxis]
+    x = exp(0.5*(edges[1:] + edges[:-1])[:, np.newaxis] + half*gl_x)
+    return x.ravel(), (half * gl_w * x).ravel()
+
+
+
+
+def scan_sigma(fn, param_grid, n_workers=None, **kwargs):
+    # Evaluate fn(*params, **kwargs) for every params tuple in param_grid across a process pool
+    # e.g. scan_sigma(iprimakoff_nsigma, [(ea, g, ma, z, r0) for ea in energies])
+    # fn must be picklable: a module-level function or an instance such as PrimakoffSigmaFF
+    if n_workers is None:
+        n_workers = max(1, multi.cpu_count()-1)
+    if kwargs:
+        fn = functools.partial(fn, **kwargs)
+    with multi.Pool(n_workers) as pool:
+        return np.array(pool.starmap(fn, param_grid))
+
+
+
+
 def kallen_alplib(x, y, z):
     return x*x + y*y + z*z - 2*x*y - 2*y*z - 2*z*x
\ No newline at end of file
@@ -6,6 +6,7 @@ from alplib.materials import Material
 from .constants import *
 from .fmath import *
 from scipy.special import spherical_jn
+from numba import njit
 
 
 
@@ -16,6 +17,7 @@ def nuclear_ff(t, m, z, a):
     # m: nucleus mass
     # z: atomic number
     # a: number of nucleons
+    # all arguments broadcast; pass t[:, None] with per-isotope m, z, a arrays to get shape (len(t), n_isotopes)
     return (2*m*z**2) / (1 + t / 164000*np.power(a, -2/3))**2
 
 
@@ -26,12 +28,14 @@ def atomic_elastic_ff(t, z):
     # Fit based on Thomas-Fermi model
     # t: MeV
     # z: atomic number
+    # t and z broadcast as in nuclear_ff
     a = 184.15*np.power(2.718, -1/2)*np.power(z, -1/3) / M_E
     return (z*t*a**2)**2 / (1 + t*a**2)**2
 
 
 
 
+@njit(cache=True, error_model="numpy")
 def Gelastic_inelastic_over_tsquared(t, Z, A):
     """
     Form factor squared used for elastic/inelastic contributions to Dark Bremsstrahlung Calculation
@@ -77,9 +81,9 @@ class ElectronElasticFF:
         self.frac = material.frac
 
     def __call__(self, q):
-        t = q**2
+        t = np.asarray(q)[..., np.newaxis]**2  # isotopes along the last axis, so q may be an array
         a = 184.15*np.power(2.718, -1/2)*np.power(self.z, -1/3) / M_E
-        return np.dot(self.frac, power(self.z*(t*a**2) / (1 + t*a**2) - self.z, 2))
+        return np.dot(power(self.z*(t*a**2) / (1 + t*a**2) - self.z, 2), self.frac)
 
 
 
@@ -411,16 +411,17 @@ class PrimakoffAxionFromBeam:
     def scatter_events(self, detector_number, detector_z, detection_time, threshold, efficiency=None):
         res = 0
         r0 = 2.2e-10 / METER_BY_MEV
+        # one vectorized cross section evaluation over all axion energies
+        sigma = iprimakoff_sigma(np.asarray(self.axion_energy, dtype=np.float64), self.axion_coupling,
+                                 self.axion_mass, detector_z, r0)
         for i in range(len(self.scatter_axion_weight)):
             if self.axion_energy[i] >= threshold:
                 if efficiency is not None:
-                    self.scatter_axion_weight[i] *= iprimakoff_sigma(self.axion_energy[i], self.axion_coupling, 
-                                                                            self.axion_mass, detector_z, r0) \
+                    self.scatter_axion_weight[i] *= sigma[i] \
                         * efficiency(self.axion_energy[i]) * detection_time * detector_number * METER_BY_MEV ** 2
                     res += self.scatter_axion_weight[i]
                 else:
-                    self.scatter_axion_weight[i] *= iprimakoff_sigma(self.axion_energy[i], self.axion_coupling, 
-                                                                            self.axion_mass, detector_z, r0) \
+                    self.scatter_axion_weight[i] *= sigma[i] \
                                                    * detection_time * detector_number * METER_BY_MEV ** 2
                     res += self.scatter_axion_weight[i]
             else:
@@ -6,7 +6,17 @@ from .fmath import *
 from .efficiency import Efficiency
 
 import json
-import pkg_resources
+import functools
+from importlib import resources
+
+
+@functools.lru_cache(maxsize=1)
+def _load_mat_params():
+    # Parse data/mat_params.json once per session; every Material reads from this dict
+    with resources.files(__package__).joinpath('data/mat_params.json').open('r') as f:
+        return json.load(f)
+
+
 
 
 class Material:
@@ -22,29 +32,41 @@ class Material:
         """
         self.mat_name = material_name
         self.efficiency = efficiency
-        fpath = pkg_resources.resource_filename(__name__, 'data/mat_params.json')
-        f = open(fpath, 'r')
-        mat_file = json.load(f)
-        f.close()
+        mat_file = _load_mat_params()
         if material_name in mat_file:
-            mat_info = mat_file[material_name]
-            self.iso = mat_info['iso']
-            self.z = np.array(mat_info['z'])
-            self.n = np.array(mat_info['n'])
-            self.m = np.array(mat_info['m'])
-            self.frac = np.array(mat_info['frac'])
-            self.lattice_const = np.array(mat_info['lattice_const'])  # Angstroms
-            self.cell_volume = np.array(mat_info['cell_volume'])  # Angstroms^3
-            self.r0 = np.array(mat_info['atomic_radius'])  # Angstroms
-            self.density = mat_info['density']  # g/cm^3
+            self._assign_mat(mat_file[material_name])
             self.fid_mass = fiducial_mass  # kg
             self.volume = volume  # cm^3
             self.ntargets = density * volume / (np.dot(self.m, self.iso*self.frac) / MEV_PER_KG / 1e-3)
             self.ndensity = density / (np.dot(self.m, self.iso*self.frac) / MEV_PER_KG / 1e-3)
-            self.rad_length = mat_info['rad_length']
         else:
             raise Exception("No such detector in mat_params.json.")
 
+    def _assign_mat(self, mat_info):
+        # per-isotope quantities are stored as contiguous 1D arrays
+        self.iso = mat_info['iso']
+        self.z = np.asarray(mat_info['z'], dtype=np.int64)
+        self.n = np.asarray(mat_info['n'], dtype=np.int64)
+        self.m = np.asarray(mat_info['m'], dtype=np.float64)
+        self.frac = np.asarray(mat_info['frac'], dtype=np.float64)
+        self.lattice_const = np.asarray(mat_info['lattice_const'], dtype=np.float64)  # Angstroms
+        self.cell_volume = np.asarray(mat_info['cell_volume'], dtype=np.float64)  # Angstroms^3
+        self.r0 = np.asarray(mat_info['atomic_radius'], dtype=np.float64)  # Angstroms
+        self.density = mat_info['density']  # g/cm^3
+        self.rad_length = mat_info['rad_length']
+
+    def nuclear_ff_total(self, t):
+        # Isotope-fraction weighted Tsai nuclear form factor, evaluated for all isotopes in one broadcast
+        from .form_factors import nuclear_ff  # form_factors imports this module
+        t = np.asarray(t, dtype=np.float64)[..., np.newaxis]
+        return np.sum(self.frac * nuclear_ff(t, self.m, self.z, self.z + self.n), axis=-1)
+
+    def atomic_elastic_ff_total(self, t):
+        # Isotope-fraction weighted Tsai atomic elastic form factor, evaluated for all isotopes in one broadcast
+        from .form_factors import atomic_elastic_ff
+        t = np.asarray(t, dtype=np.float64)[..., np.newaxis]
+        return np.sum(self.frac * atomic_elastic_ff(t, self.z), axis=-1)
+
 
 
 
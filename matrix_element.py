@@ -6,6 +6,9 @@ from .fmath import *
 from .constants import *
 from .form_factors import *
 
+from numba import njit, prange
+import math
+
 
 
 class MatrixElement2:
@@ -244,6 +247,77 @@ class M2VectorScalarPrimakoffIncoherent(MatrixElement2):
 
 
 
+@njit(cache=True)
+def _m2_pair_alp_terms(kp1, kp2, kl1, kl2, p1p2, p1l1, p2l1, p1l2, p2l2, ma, mN):
+    # |M1|^2, |M2|^2 and the interference M2*M1 of a + N -> e+ e- N from the 4-vector scalar products
+    # shared by M2PairProduction.sub_elements(case="alp") and _m2_pair_kernel; arguments may be scalars or arrays
+    me2 = M_E*M_E
+    ma2 = ma*ma
+    me_mN2 = me2*mN*mN
+    cross = p2l1*p1l2 + p1l1*p2l2
+    m1_2 = -32 * ( (me2 - kp1)*(2*kl2*p2l1 + 2*kl1*p2l2) + (ma2 - 2*me2)*cross )
+    m2_2 = -32 * ( (me2 - kp2)*(2*kl2*p1l1 + 2*kl1*p1l2) + (ma2 - 2*me2)*cross )
+    m2_m1 = -32 * ( kp1 * (kl2*p2l1 + kl1*p2l2 - me_mN2) \
+                    + kp2 * (kl2*p1l1 + kl1*p1l2 - me_mN2) \
+                    - 2*kl1*kl2*p1p2 - p2l1*p1l2*ma2 + (me2 - ma2)*p1l1*p2l2 \
+                    + p2l1*p1l2*me2 + p1p2*me2*ma2 + me_mN2*me2 )
+    return m1_2, m2_2, m2_m1
+
+
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _m2_pair_kernel(Ea, Ep, tp, tm, phi, ma, mN):
+    # Coupling- and form-factor-free |M|^2 of M2PairProduction.m2 (case="alp") over flat, equal-length arrays
+    # returns the matrix element and the momentum transfer q2 of each sample
+    n = Ep.shape[0]
+    m2_out = np.empty(n)
+    q2_out = np.empty(n)
+    me2 = M_E*M_E
+    ma2 = ma*ma
+    for i in prange(n):
+        c1 = math.cos(tp[i])
+        c2 = math.cos(tm[i])
+        s1 = math.sin(tp[i])
+        s2 = math.sin(tm[i])
+        cphi = math.cos(phi[i])
+
+        p1 = math.sqrt(Ep[i]*Ep[i] - me2)
+        Em = Ea[i] - Ep[i]
+        p2 = math.sqrt(Em*Em - me2)
+        k = math.sqrt(Ea[i]*Ea[i] - ma2)
+
+        # 3-vector dot products
+        p1_dot_p2 = p1*p2*(s1*s2*cphi + c1*c2)
+        l2_dot_k = k*k - k*p1*c1 - k*p2*c2
+        l2_dot_p1 = k*p1*c1 - me2 - p1_dot_p2
+        l2_dot_p2 = k*p2*c2 - me2 - p1_dot_p2
+
+        # 4-vector scalar products
+        kp1 = Ea[i]*Ep[i] - k*p1*c1
+        kp2 = Ea[i]*Em - k*p2*c2
+        kl1 = Ea[i]*mN
+        kl2 = Ea[i]*mN - l2_dot_k
+        p1p2 = Ep[i]*Em - p1_dot_p2
+        p1l1 = Ep[i]*mN
+        p2l1 = Em*mN
+        p1l2 = Ep[i]*mN - l2_dot_p1
+        p2l2 = Em*mN - l2_dot_p2
+
+        m1_2, m2_2, m2_m1 = _m2_pair_alp_terms(kp1, kp2, kl1, kl2, p1p2, p1l1, p2l1, p1l2, p2l2, ma, mN)
+
+        q2 = ma2 + 2*me2 - 2*kp1 - 2*kp2 + 2*p1p2
+        propagator1 = q2*(ma2 - 2*kp1)
+        propagator2 = q2*(ma2 - 2*kp2)
+
+        m2_out[i] = m1_2 / (propagator1*propagator1) + m2_2 / (propagator2*propagator2) \
+                    + 2 * m2_m1 / (propagator2*propagator1)
+        q2_out[i] = q2
+    return m2_out, q2_out
+
+
+
+
 class M2PairProduction:
     """
     a + N -> e+ e- N    ALP-driven pair production
@@ -256,13 +330,7 @@ class M2PairProduction:
 
     def sub_elements(self, kp1, kp2, kl1, kl2, p1p2, p1l1, p2l1, p1l2, p2l2, case="alp"):
         if case == "alp":
-            m1_2 = -32 * ( (M_E**2 - kp1)*(2*kl2*p2l1 + 2*kl1*p2l2) + (self.ma**2 - 2*M_E**2)*(p2l1*p1l2 + p1l1*p2l2) )
-            m2_2 = -32 * ( (M_E**2 - kp2)*(2*kl2*p1l1 + 2*kl1*p1l2) + (self.ma**2 - 2*M_E**2)*(p2l1*p1l2 + p1l1*p2l2) )
-            m2_m1 = -32 * ( kp1 * (kl2*p2l1 + kl1*p2l2 - power(M_E*self.mN, 2)) \
-                            + kp2 * (kl2*p1l1 + kl1*p1l2 - power(M_E*self.mN, 2)) \
-                            - 2*kl1*kl2*p1p2 - p2l1*p1l2*self.ma**2 + (M_E**2 - self.ma**2)*p1l1*p2l2 \
-                            + p2l1*p1l2*M_E**2 + p1p2*power(M_E*self.ma,2) + power(self.mN*M_E**2, 2) )
-            return m1_2, m2_2, m2_m1
+            return _m2_pair_alp_terms(kp1, kp2, kl1, kl2, p1p2, p1l1, p2l1, p1l2, p2l2, float(self.ma), float(self.mN))
         elif case == "vector":
             return 0.0
         elif case == "sm":
@@ -286,6 +354,8 @@ class M2PairProduction:
         # p2: electron momentum
         # l1: initial nucleus momentum
         # l2: final nucleus momentum
+        if case == "alp":
+            return self.m2_alp(Ea, Ep, tp, tm, phi, coupling)
         c1 = cos(tp)
         c2 = cos(tm)
         s1 = sin(tp)
@@ -321,11 +391,19 @@ class M2PairProduction:
         propagator1 = q2*(self.ma**2 - 2*kp1)
         propagator2 = q2*(self.ma**2 - 2*kp2)
 
-        prefactor = power(4*pi*ALPHA*coupling, 2) * self.ff2(sqrt(abs(q2)))
+        prefactor = power(4*pi*ALPHA, 2) * self.ff2(sqrt(abs(q2)))
 
-        return prefactor * (m1_2 / power(propagator1, 2) \
+        return coupling**2 * (prefactor * (m1_2 / power(propagator1, 2) \
                             + m2_2 / power(propagator2, 2) \
-                            + 2 * m2_m1 / propagator2 / propagator1)
+                            + 2 * m2_m1 / propagator2 / propagator1))
+
+    def m2_alp(self, Ea, Ep, tp, tm, phi, coupling=1.0):
+        # m2(case="alp") evaluated with the compiled _m2_pair_kernel; inputs are broadcast against each other
+        Ea, Ep, tp, tm, phi = np.broadcast_arrays(*[np.asarray(v, dtype=np.float64) for v in (Ea, Ep, tp, tm, phi)])
+        m2_wgts, q2 = _m2_pair_kernel(Ea.ravel(), Ep.ravel(), tp.ravel(), tm.ravel(), phi.ravel(),
+                                      float(self.ma), float(self.mN))
+        prefactor = power(4*pi*ALPHA, 2) * self.ff2(sqrt(abs(q2)))
+        return (coupling**2 * prefactor * m2_wgts).reshape(Ea.shape)
 
     def m2_separated(self, Ea, Ep, tp, tm, phi, coupling=1.0, case="alp"):
         # k: ALP momentum
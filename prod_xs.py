@@ -7,6 +7,13 @@ from .fmath import *
 from .decay import *
 from .form_factors import *
 
+from numba import cfunc, njit, prange, types, vectorize, float64
+from scipy import LowLevelCallable
+from scipy.interpolate import CubicSpline
+
+import functools
+import math
+
 def nuclear_ff(t, m, z, a):
     # Parameterization of the coherent nuclear form factor (Tsai, 1986)
     # t: MeV
@@ -29,10 +36,34 @@ def atomic_elastic_ff(t, z):
 
 
 
+@functools.lru_cache(maxsize=128)
+def _tsai_logs(z):
+    # Elastic and inelastic screening logarithms (Tsai, 1986), cached by z
+    return log(184*power(z, -1/3)), log(1194*power(z, -2/3))
+
+
+
+
+@functools.lru_cache(maxsize=128)
+def _tsai_screening(z):
+    # Elastic and inelastic screening parameters a, a' (Tsai, 1986), cached by z
+    return 111*power(z, -1/3)/M_E, 773*power(z, -2/3)/M_E
+
+
+
+
 #### Photon coupling ####
 
+@njit(cache=True)
+def _primakoff_num(t, s, ma, M):
+    # Mandelstam polynomial common to the (inverse) Primakoff dsigma/dt with photon or massive vector exchange
+    return t*(M**2 + s)*ma**2 - (M * ma**2)**2 - t*((s-M**2)**2 + s*t) - t*(t-ma**2)/2
+
+
+
+
 def free_primakoff_dsigma_dt(t, s, ma, M, g):
-    num = ALPHA * g**2 * (t*(M**2 + s)*ma**2 - (M * ma**2)**2 - t*((s-M**2)**2 + s*t) - t*(t-ma**2)/2)
+    num = ALPHA * g**2 * _primakoff_num(t, s, ma, M)
     denom = 4*t**2 * ((M + ma)**2 - s)*((M - ma)**2 - s)
     return heaviside(num/denom, 0.0) * (num / denom)
 
@@ -41,43 +72,109 @@ def free_primakoff_dsigma_dt(t, s, ma, M, g):
 
 class PrimakoffSigmaFF:
     # Primakoff scattering with Nuclear and Atomic Form factors
-    def __init__(self, mat: Material):
+    def __init__(self, mat: Material, q_max=1.0e3, n_q=4096):
         self.mat = mat
         self.z = mat.z[0]
         self.M = mat.m[0]
-        self.helm_ff = NuclearHelmFF(mat)
+        self.helm_ff = NuclearHelmFF(mat.n[0], mat.z[0])
         self.atomic_ff = ElectronElasticFF(mat)
-    
+        self.n_q = n_q
+        self.build_ff_splines(q_max)
+
+    def build_ff_splines(self, q_max):
+        # Tabulate both form factors once on a log-spaced q grid (MeV) and spline them in log(q);
+        # q below the first node is clamped to it, where both form factors have saturated to z^2
+        self.q_min = 1.0e-6
+        self.q_max = q_max
+        log_q_grid = np.linspace(log(self.q_min), log(q_max), self.n_q)
+        q_grid = exp(log_q_grid)
+        self._helm_spl = CubicSpline(log_q_grid, self.helm_ff(q_grid))
+        self._atomic_spl = CubicSpline(log_q_grid, self.atomic_ff(q_grid))
+
     def dsigma_dt(self, t, s, ma, M, g):
+        return self.dsigma_dt_vec(t, s, ma, M, g)
+
+    def dsigma_dt_vec(self, t, s, ma, M, g):
+        # t may be an array of momentum transfers
+        q = sqrt(-t)
+        if np.max(q) > self.q_max:
+            self.build_ff_splines(2*np.max(q))
+        log_q = log(np.clip(q, self.q_min, None))
         dsigma_dt = free_primakoff_dsigma_dt(t, s, ma, M, g)
-        return dsigma_dt * (self.helm_ff(sqrt(-t)) + self.atomic_ff(sqrt(-t)))
+        return dsigma_dt * (self._helm_spl(log_q) + self._atomic_spl(log_q))
 
-    def __call__(self, egamma, ma, g):
+    def t_bounds(self, egamma, ma):
+        # integration range [tmin, tmax] of __call__
         s = 2*egamma*self.M + self.M**2
         pa_cm2 = (s - self.M**2)**2 / (4*s)
         tmin = ma**2 - 2*egamma*(sqrt(pa_cm2 + ma**2) + sqrt(pa_cm2))
-        tmax = ma**2 - 2*egamma*(sqrt(pa_cm2 + ma**2) - sqrt(pa_cm2))
-        
-        return quad(self.dsigma_dt, tmin, tmax, args=(s, ma, self.M, g,))[0]
+        tmax = ma**2 - 2*egamma*ma**2/(sqrt(pa_cm2 + ma**2) + sqrt(pa_cm2))
 
+        # cap tmax at the physical endpoint t+ = (ma^2 M)^2 / (s t-) so that the range never reaches t >= 0
+        sqrt_s = sqrt(s)
+        eg_cm = (s - self.M**2)/(2*sqrt_s)
+        ea_cm = (s + ma**2 - self.M**2)/(2*sqrt_s)
+        t_minus = ma**2 - 2*eg_cm*(ea_cm + sqrt(ea_cm**2 - ma**2))
+        return tmin, min(tmax, (ma**2 * self.M)**2 / (s * t_minus))
 
+    def __call__(self, egamma, ma, g):
+        # below threshold, s < (M + ma)^2
+        if egamma <= ma + ma**2/(2*self.M):
+            return 0.0
+        s = 2*egamma*self.M + self.M**2
+        tmin, tmax = self.t_bounds(egamma, ma)
+
+        # the integrand falls like 1/t over the many decades below tmax, so integrate panel-wise in log(-t)
+        minus_t, w = log_gauss_legendre_rule(max(-tmax, 1e-30), -tmin)
+        return np.dot(w, self.dsigma_dt_vec(-minus_t, s, ma, self.M, g))
+
+
+
+
+@njit(cache=True, error_model="numpy")
+def _primakoff_dsigma_dtheta_kernel(theta, energy, z, ma, g):
+    # scalar Primakoff diffxs by theta, shared by primakoff_dsigma_dtheta and the quad integrand below
+    # t = 2*energy*(pa*cos(theta) - energy) + ma^2 is written in sin^2(theta/2) so it does not cancel at small theta
+    if energy <= ma:
+        return 0.0
+    pa = math.sqrt(energy*energy - ma*ma)
+    t = -(ma*ma/(energy + pa))**2 - 4*energy*pa*math.sin(theta/2)**2
+    ff = 1 #_nuclear_ff(t, ma, z, 2*z)
+    return ALPHA * (g * z * ff * pa*pa / t)**2 * math.sin(theta)**3 / 4
 
+@vectorize([float64(float64, float64, float64, float64, float64)], cache=True)
+def _primakoff_dsigma_dtheta_ufunc(theta, energy, z, ma, g):
+    return _primakoff_dsigma_dtheta_kernel(theta, energy, z, ma, g)
 
 def primakoff_dsigma_dtheta(theta, energy, z, ma, g=1):
     # Primakoff scattering production diffxs by theta (γ + A -> a + A)
-    if energy < ma:
-        return 0
-    pa = sqrt(energy**2 - ma**2)
-    t = 2*energy*(pa*cos(theta) - energy) + ma**2
-    ff = 1 #_nuclear_ff(t, ma, z, 2*z)
-    return ALPHA * (g * z * ff * pa**2 / t)**2 * sin(theta)**3 / 4
+    # theta and/or energy may be arrays
+    return _primakoff_dsigma_dtheta_ufunc(theta, energy, z, ma, g)
+
+
+
+
+@cfunc(types.float64(types.intc, types.CPointer(types.float64)), error_model="numpy")
+def _primakoff_dsigma_dtheta_cfunc(n, xx):
+    # compiled integrand for primakoff_nsigma, called by quad as f(n, [theta, energy, z, ma, g])
+    return _primakoff_dsigma_dtheta_kernel(xx[0], xx[1], xx[2], xx[3], xx[4])
 
+_primakoff_dsigma_dtheta_llc = LowLevelCallable(_primakoff_dsigma_dtheta_cfunc.ctypes,
+                                                signature="double (int, double *)")
 
 
 
-def primakoff_nsigma(energy, z, ma, g=1):
+
+def primakoff_nsigma(energy, z, ma, g=1, use_quad=False):
     # Primakoff production total xs, numerical eval. (γ + A -> a + A)
-    return quad(primakoff_dsigma_dtheta, 0, pi, args=(energy,z,ma,g), limit=3)[0]
+    # composite Gauss-Legendre in log(theta) by default; use_quad=True integrates with quad instead (for validation)
+    if energy < ma:
+        return 0
+    if use_quad:
+        return quad(_primakoff_dsigma_dtheta_llc, 0, pi, args=(energy,z,ma,g), limit=200)[0]
+    # the integrand falls like 1/theta down to theta ~ (ma/energy)^2 and like theta^3 below it
+    theta, w = log_gauss_legendre_rule(max(1e-3*(ma/energy)**2, 1e-30), pi)
+    return np.dot(w, primakoff_dsigma_dtheta(theta, energy, z, ma, g))
 
 
 
@@ -89,44 +186,72 @@ def primakoff_sigma_tsai(energy, z, a, ma, g):
         return 0
     M_E = 0.511
     prefactor = (1 / 137 / 4) * (g ** 2)
-    return prefactor * ((z ** 2) * (log(184 * power(z, -1 / 3)) \
+    ln_el, ln_inel = _tsai_logs(z)
+    return prefactor * ((z ** 2) * (ln_el \
         + log(403 * power(a, -1 / 3) / M_E)) \
-        + z * log(1194 * power(z, -2 / 3)))
+        + z * ln_inel)
 
 
 
 
+@njit(cache=True, fastmath=True)
+def _primakoff_sigma_kernel(eg, g, ma, z, r0):
+    if eg <= ma:
+        return 0.0
+    prefactor = (g * z)**2 / (2*137)
+    eta2 = r0**2 * eg**2
+    return prefactor * (((2*eta2 + 1)/(4*eta2))*math.log(1+4*eta2) - 1)
+
+@vectorize([float64(float64, float64, float64, float64, float64)], fastmath=True, cache=True)
+def _primakoff_sigma_ufunc(eg, g, ma, z, r0):
+    return _primakoff_sigma_kernel(eg, g, ma, z, r0)
+
 def primakoff_sigma(eg, g, ma, z, r0 = 2.2e-10 / METER_BY_MEV):
     # inverse-Primakoff scattering total xs (Creswick et al)
     # r0: screening parameter
-    prefactor = (g * z)**2 / (2*137)
-    eta2 = r0**2 * eg**2
-    return heaviside(eg-ma, 0.0)*prefactor * (((2*eta2 + 1)/(4*eta2))*log(1+4*eta2) - 1)
+    # scalar calls skip the ufunc, whose dispatch costs more than the kernel itself
+    if all(isinstance(v, (float, int, np.number)) for v in (eg, g, ma, z, r0)):
+        return _primakoff_sigma_kernel(float(eg), float(g), float(ma), float(z), float(r0))
+    return _primakoff_sigma_ufunc(eg, g, ma, z, r0)
+
+
+
+
+def _kin_epem(ep, ma):
+    # CM kinematics for e+ (lab energy ep) on e- at rest -> ALP (mass ma) + photon
+    # returns s, positron CM energy and momentum, ALP CM energy and momentum, and the CM boost beta, gamma
+    # broadcasts over ep; below threshold (ep < M_E) the momenta and boost are nan
+    me2 = M_E*M_E
+    s = 2*me2 + 2*M_E*ep
+    sqrts = sqrt(s)
+    ep_cm = 0.5*sqrts
+    pp_cm = sqrt(np.where(ep < M_E, np.nan, 0.25*s - me2))
+    pa_cm = abs(s - ma*ma)/(2*sqrts)
+    ea_cm = sqrt(pa_cm*pa_cm + ma*ma)
+    beta = sqrt(np.where(ep < M_E, np.nan, ep*ep - me2)) / (M_E + ep)
+    gamma = 1.0/sqrt(1 - beta*beta)
+    return s, ep_cm, pp_cm, ea_cm, pa_cm, beta, gamma
 
 
 
 
 def epem_to_alp_photon_dsigma_de(ea, ep, g=1.0, ma=1.0, z=1):
     # e+ e- annihilation into gamma ALP via a virtual photon
-    s = 2 * M_E * (M_E + ep)
-    ps_cm = sqrt((s - ma**2)**2 / (4*s))
-    pp_cm = sqrt(((s - 2*M_E**2)**2 - 4*M_E**4)/ (4*s))
-    es_cm = sqrt(ps_cm**2 + ma**2)
-    ep_cm = sqrt(pp_cm**2 + M_E**2)
-
-    beta = sqrt(ep**2 - M_E**2) / (M_E + ep)
-    gamma = power(1-beta**2, -0.5)
+    s, ep_cm, pp_cm, es_cm, ps_cm, beta, gamma = _kin_epem(ep, ma)
 
     costheta =  (ea/gamma - es_cm)/(beta*ps_cm)
 
-    t = ma**2 + M_E**2 - 2 * (ep_cm * es_cm - pp_cm * ps_cm * costheta)
+    me2 = M_E*M_E
+    ma2 = ma*ma
+    ma4 = ma2*ma2
+    t = ma2 + me2 - 2 * (ep_cm * es_cm - pp_cm * ps_cm * costheta)
 
-    m_st = z * 4*pi*ALPHA*g**2 * (2*s*M_E**4 + 2*M_E**2 * (ma**4 - s*ma**2 - 2*s*t) \
-        + s*(ma**4 - 2*ma**2 * (s + t) + s**2 + 2*s*t + 2*t**2))/s**2
+    m_st = z * 4*pi*ALPHA*g*g * (2*s*me2*me2 + 2*me2 * (ma4 - s*ma2 - 2*s*t) \
+        + s*(ma4 - 2*ma2 * (s + t) + s*s + 2*s*t + 2*t*t))/(s*s)
     
     jacobian = 2 * pp_cm / gamma / beta
     
-    return heaviside(ep - max((ma**2 - M_E**2)/(2*M_E), M_E), 1.0) * jacobian * m_st / (16*pi*(s - 4*M_E**2)*s)
+    return heaviside(ep - max((ma2 - me2)/(2*M_E), M_E), 1.0) * jacobian * m_st / (16*pi*(s - 4*me2)*s)
 
 
 
@@ -135,19 +260,37 @@ def epem_to_alp_photon_dsigma_de(ea, ep, g=1.0, ma=1.0, z=1):
 
 #### Electron coupling ####
 
+@vectorize([float64(float64, float64, float64, float64)], fastmath=True, cache=True)
+def _compton_sigma_ufunc(eg, g, ma, z):
+    if eg <= ma:
+        return 0.0
+    me2 = M_E*M_E
+    ma2 = ma*ma
+    eg_me = eg*M_E
+    one_over_eg_me2 = 1.0/(eg_me*eg_me)
+    s = 2*eg_me + me2
+    sqrts = math.sqrt(s)
+    p0 = 0.5*(2*eg_me + ma2)/sqrts
+    k0 = (eg_me + me2)/sqrts
+    p = math.sqrt(p0*p0 - ma2)
+    k = sqrts - k0
+    
+    prefactor = (z*ALPHA*g**2 / (8*s)) * (p/k)
+    return prefactor * (-3 + (me2 - ma2)/s + 0.25*s*ma2*one_over_eg_me2 \
+                        + (1 - (ma2 / eg_me) + 0.5*ma2*(ma2 - 2*me2)*one_over_eg_me2) \
+                            * (sqrts/p)*math.log((2*p0*k0 + 2*p*k - ma2)/(2*p0*k0 - 2*p*k - ma2)))
+
 def compton_sigma(eg, g, ma, z=1):
     # Compton scattering total cross section (γ + e- > a + e-)
     # Taken from 0807.2926. Validated.
-    s = 2*eg*M_E + M_E**2
-    p0 = 0.5*(2*eg*M_E + ma**2)/sqrt(s)
-    k0 = (eg*M_E + M_E**2)/sqrt(s)
-    p = sqrt(p0**2 - ma**2)
-    k = sqrt(s) - k0
-    
-    prefactor = heaviside(eg-ma,0.0)*(z*ALPHA*g**2 / (8*s)) * (p/k)
-    return prefactor * (-3 + (M_E**2 - ma**2)/s + s*power(ma / (2*eg*M_E),2) \
-                        + (1 - (ma**2 / (eg*M_E)) + (ma**2 * (ma**2 - 2*M_E**2)/(2*power(eg*M_E,2)))) \
-                            * (sqrt(s)/p)*log((2*p0*k0 + 2*p*k - ma**2)/(2*p0*k0 - 2*p*k - ma**2)))
+    return _compton_sigma_ufunc(eg, g, ma, z)
+
+
+
+
+def compton_sigma_vec(eg, g, ma, z=1):
+    # Compton scattering total cross section (γ + e- > a + e-) over an array of photon energies eg
+    return compton_sigma(np.asarray(eg, dtype=np.float64), g, ma, z)
 
 
 
@@ -173,12 +316,15 @@ def compton_dsigma_dea(ea, eg, g, ma, z=1):
 
 def compton_dsigma_domega(theta, Ea, ma, ge):
     # Differential cross-section dS/dOmega_a. (γ + e- > a + e-)
-    y = 2*M_E*Ea + ma**2
-    pa = sqrt(Ea**2 - ma**2)
+    ma2 = ma*ma
+    y = 2*M_E*Ea + ma2
+    pa = sqrt(Ea*Ea - ma2)
     e_gamma = 0.5*y/(M_E + Ea - pa*cos(theta))
+    r = M_E*e_gamma/y
+    ma_pa_sin = ma*pa*sin(theta)
 
-    prefactor = ge**2 * ALPHA * e_gamma / (4*pi*2*pa*M_E**2)
-    return prefactor * (1 + 4*(M_E*e_gamma/y)**2 - 4*M_E*e_gamma/y - 4*M_E*e_gamma*(ma*pa*sin(theta))**2 / y**3)
+    prefactor = ge*ge * ALPHA * e_gamma / (4*pi*2*pa*M_E*M_E)
+    return prefactor * (1 + 4*r*r - 4*r - 4*M_E*e_gamma*ma_pa_sin*ma_pa_sin / (y*y*y))
 
 
 
@@ -187,38 +333,69 @@ def brem_dsigma_dea_domega(Ea, thetaa, Ee, g, ma, z):
     # Differential cross section d^2 Sigma/(dE_a dOmega) for ALP bremsstrahlung (e- Z -> e- Z a)
     # Tsai, 1986
     theta_max = max(sqrt(ma*M_E)/Ee, power(ma/Ee, 3/2))
+    me2 = M_E*M_E
+    ma2 = ma*ma
     x = Ea / Ee
-    l = (Ee * thetaa / M_E)**2
-    U = l*x*M_E**2 + x*M_E**2 + ((1-x)*ma**2) / x
-    tmin = (U / (2*Ee*(1-x)))**2
-    a = 111*power(z, -1/3)/M_E
-    aPrime = 773*power(z, -2/3)/M_E
+    x3 = x*x*x
+    one_minus_x = 1 - x
+    l = Ee * thetaa / M_E
+    l = l*l
+    U = l*x*me2 + x*me2 + (one_minus_x*ma2) / x
+    tmin = U / (2*Ee*one_minus_x)
+    tmin = tmin*tmin
+    a, aPrime = _tsai_screening(z)
 
     # form factor 
-    chi = z**2 * (log(power(a*M_E*(1+l),2) / (a**2 * tmin + 1)) - 1) \
-        + z * (log(power(aPrime*M_E*(1+l),2) / (aPrime**2 * tmin + 1)) - 1)
+    a_me = a*M_E*(1+l)
+    aPrime_me = aPrime*M_E*(1+l)
+    chi = z*z * (log(a_me*a_me / (a*a * tmin + 1)) - 1) \
+        + z * (log(aPrime_me*aPrime_me / (aPrime*aPrime * tmin + 1)) - 1)
+
+    prefactor = heaviside(chi, 0.0) * heaviside(theta_max - thetaa, 0.0) * ((ALPHA * g)**2 / (4*pi**2)) * Ee / (U*U)
 
-    prefactor = heaviside(chi, 0.0) * heaviside(theta_max - thetaa, 0.0) * ((ALPHA * g)**2 / (4*pi**2)) * Ee / U**2
+    return chi * prefactor * (x3 - 2*ma2*x*x * one_minus_x/U  \
+                                + 2*ma2/(U*U) * (x*ma2*one_minus_x*one_minus_x + me2 * x3 * one_minus_x))
 
-    return chi * prefactor * (x**3 - 2*(ma*x)**2 * (1-x)/U  \
-                                + 2*(ma/U)**2 * (x*(ma*(1-x))**2 + M_E**2 * x**3 * (1-x)))
 
 
 
+@njit(cache=True, error_model="numpy")
+def _brem_dsigma_dea_kernel(Ea, Ee, g, ma, z, chi):
+    # scalar Tsai dSigma/dE_a, shared by brem_dsigma_dea and the quad integrand of brem_sigma
+    # chi = z^2 ln_el + z ln_inel from the cached Tsai logarithms
+    r0 = ALPHA / M_E
+    x = Ea / Ee
+    f = ma / (x * M_E)
+    f = f*f * (1 - x)
+    one_plus_f_sq = (1+f)*(1+f)
+
+    prefactor = 2 * r0*r0 * g*g / 4 / pi / Ee  # divide by Ee to change dsigma/dx into dsigma/dEa
+    phase_space = ((x * (1 + f/1.5)/one_plus_f_sq) * chi \
+                        + x * (z*z + z) * ((1+f)*math.log(1+f)/(3*f*f) - (1 + 4*f + 2*f*f)/(3 * f * one_plus_f_sq)))
+    if phase_space < 0.0:
+        return 0.0
+    return prefactor * phase_space
+
+@vectorize([float64(float64, float64, float64, float64, float64, float64)], cache=True)
+def _brem_dsigma_dea_ufunc(Ea, Ee, g, ma, z, chi):
+    return _brem_dsigma_dea_kernel(Ea, Ee, g, ma, z, chi)
 
 def brem_dsigma_dea(Ea, Ee, g, ma, z):
     # Differential cross section dSigma/dE_a for ALP bremsstrahlung (e- Z -> e- Z a)
     # Tsai, 1986
-    r0 = ALPHA / M_E
-    x = Ea / Ee
-    f = power(ma / (x * M_E), 2) * (1 - x)
-    ln_el = log(184*power(z, -1/3))
-    ln_inel = log(1194*power(z, -2/3))
+    # Ea may be an array (e.g. MC samples); the z-dependent logs are scalars cached by z
+    ln_el, ln_inel = _tsai_logs(z)
+    return _brem_dsigma_dea_ufunc(Ea, Ee, g, ma, z, z*z * ln_el + z * ln_inel)
+
+
+
 
-    prefactor = 2 * r0**2 * g**2 / 4 / pi / Ee  # divide by Ee to change dsigma/dx into dsigma/dEa
-    phase_space = ((x * (1 + f/1.5)/power(1+f, 2)) * (z**2 * ln_el + z * ln_inel) \
-                        + x * (z**2 + z) * ((1+f)*log(1+f)/(3*f**2) - (1 + 4*f + 2*f**2)/(3 * f * power(1+f, 2))))
-    return prefactor * phase_space * heaviside(phase_space, 0.0)
+@cfunc(types.float64(types.intc, types.CPointer(types.float64)), error_model="numpy")
+def _brem_dsigma_dea_cfunc(n, xx):
+    # compiled integrand for brem_sigma and brem_sigma_v2, called by quad as f(n, [Ea, Ee, g, ma, z, chi])
+    return _brem_dsigma_dea_kernel(xx[0], xx[1], xx[2], xx[3], xx[4], xx[5])
+
+_brem_dsigma_dea_llc = LowLevelCallable(_brem_dsigma_dea_cfunc.ctypes, signature="double (int, double *)")
 
 
 
@@ -228,7 +405,8 @@ def brem_sigma(Ee, g, ma, z=1):
     # Tsai 1986
     #ea_max = Ee * (1 - max(power(M_E/ma, 2), power(ma/Ee, 2)))
     ea_max = Ee * (1 - power(ma/Ee, 2))
-    return heaviside(Ee-ma,0.0)*quad(brem_dsigma_dea, ma, ea_max, args=(Ee, g, ma, z,))[0]
+    ln_el, ln_inel = _tsai_logs(z)
+    return heaviside(Ee-ma,0.0)*quad(_brem_dsigma_dea_llc, ma, ea_max, args=(Ee, g, ma, z, z*z * ln_el + z * ln_inel,))[0]
 
 
 
@@ -236,15 +414,29 @@ def brem_sigma(Ee, g, ma, z=1):
 def brem_sigma_v2(Ee, g, ma, z=1):
     # Total axion bremsstrahlung production cross section (e- Z -> e- Z a)
     # Tsai 1986
-    return heaviside(Ee-ma,0.0)*quad(brem_dsigma_dea, ma, Ee*0.9999, args=(Ee, g, ma, z,))[0]
+    ln_el, ln_inel = _tsai_logs(z)
+    return heaviside(Ee-ma,0.0)*quad(_brem_dsigma_dea_llc, ma, Ee*0.9999, args=(Ee, g, ma, z, z*z * ln_el + z * ln_inel,))[0]
 
 
 
 
 def brem_sigma_mc(Ee, g, ma, z=1, nsamples=100):
+    # Total axion bremsstrahlung production cross section (e- Z -> e- Z a)
+    # Monte Carlo over Ea in [ma, ea_max], one vectorized call to brem_dsigma_dea
     ea_max = Ee * (1 - power(ma/Ee, 2))
     ea_rnd = np.random.uniform(ma, ea_max, nsamples)
-    mc_vol = (Ee - ma)/nsamples
+    mc_vol = (ea_max - ma)/nsamples
+    return mc_vol * np.sum(brem_dsigma_dea(ea_rnd, Ee, g, ma, z))
+
+
+
+
+def brem_sigma_qmc(Ee, g, ma, z=1, nsamples=100):
+    # Total axion bremsstrahlung production cross section (e- Z -> e- Z a)
+    # Quasi-Monte Carlo over Ea using a scrambled Halton sequence (lower variance than brem_sigma_mc)
+    ea_max = Ee * (1 - power(ma/Ee, 2))
+    ea_rnd = ma + (ea_max - ma) * qmc.Halton(d=1, scramble=True).random(nsamples)[:,0]
+    mc_vol = (ea_max - ma)/nsamples
     return mc_vol * np.sum(brem_dsigma_dea(ea_rnd, Ee, g, ma, z))
 
 
@@ -252,8 +444,17 @@ def brem_sigma_mc(Ee, g, ma, z=1, nsamples=100):
 
 def resonance_sigma(ee, ma, g):
     # Resonant production cross section (e- e+ -> a)
-    s = 2*M_E*ee
-    return (12 * pi / ma**2) * (power(W_ee(g, ma)/2, 2)/((sqrt(s) - ma)**2 + power(W_ee(g, ma)/2, 2)))
+    return resonance_sigma_vec(ee, ma, g)
+
+
+
+
+def resonance_sigma_vec(ee, ma, g):
+    # Resonant production cross section (e- e+ -> a) over an array of positron energies ee
+    # the width W_ee is computed once for the whole scan
+    half_w2 = power(W_ee(g, ma)/2, 2)
+    s = 2*M_E*np.asarray(ee, dtype=np.float64)
+    return (12 * pi / ma**2) * (half_w2/((sqrt(s) - ma)**2 + half_w2))
 
 
 
@@ -269,27 +470,35 @@ def resonance_peak(g, ma):
 def associated_dsigma_dcos_CM(costheta_cm, ep_lab, ma, g, z=1):
     # Associated production from pair annihilation (e+ e- -> \gamma a)
     # Calculated with Mathematica
-    s = 2*M_E*(ep_lab + M_E)
-    ea_cm = sqrt(power(s - ma**2, 2) / (4*s) + ma**2)
-    ep_cm = sqrt(M_E * (ep_lab + M_E) / 2)
-    pa_cm = sqrt(ea_cm**2 - ma**2)
-    pp_cm = sqrt(ep_cm**2 - M_E**2)
-    t = ma**2 + M_E**2 - 2 * (ep_cm * ea_cm - pp_cm * pa_cm * costheta_cm)
+    me2 = M_E*M_E
+    me4 = me2*me2
+    ma2 = ma*ma
+    s, ep_cm, pp_cm, ea_cm, pa_cm, _, _ = _kin_epem(ep_lab, ma)
+    t = ma2 + me2 - 2 * (ep_cm * ea_cm - pp_cm * pa_cm * costheta_cm)
 
-    u_prop = (M_E**2 + ma**2 - s - t)
-    t_prop = (M_E**2 - t)
-    tmast = t * (-ma**2 + s + t)
+    u_prop = (me2 + ma2 - s - t)
+    t_prop = (me2 - t)
+    tmast = t * (-ma2 + s + t)
 
-    Mt2 = -4*((-M_E**2 * (s + ma**2)) + 3*M_E**4 + tmast)/t_prop**2
-    Mu2 = -4*((M_E**2 * (ma**2 - 3*s - 4*t)) + 7*M_E**4 + tmast)/u_prop**2
-    MtMu = 4*((M_E**2 * (s - 2*t)) - 3*M_E**4 + tmast)/(u_prop*t_prop)
+    Mt2 = -4*((-me2 * (s + ma2)) + 3*me4 + tmast)/(t_prop*t_prop)
+    Mu2 = -4*((me2 * (ma2 - 3*s - 4*t)) + 7*me4 + tmast)/(u_prop*u_prop)
+    MtMu = 4*((me2 * (s - 2*t)) - 3*me4 + tmast)/(u_prop*t_prop)
 
     M2 = Mt2 + Mu2 + 2*MtMu
     jacobian = 2 * ep_cm * ea_cm  # dt/dcostheta
 
     prefactor = z * (4*pi*ALPHA) * g**2
     
-    return heaviside(ep_lab - max((ma**2 - M_E**2)/(2*M_E), M_E), 1.0) * prefactor * jacobian * M2 / (16*pi*(s - 4*M_E**2)*s)
+    return heaviside(ep_lab - max((ma2 - me2)/(2*M_E), M_E), 1.0) * prefactor * jacobian * M2 / (16*pi*(s - 4*me2)*s)
+
+
+
+
+@vectorize([float64(float64, float64, float64, float64)], fastmath=True, cache=True)
+def _brem_dsigma_dx_vector_ufunc(x, coupling, ma, chi):
+    # chi: z**2 * ln_el + z * ln_inel, precomputed by the caller
+    prefactor = chi * (4*ALPHA**2 * coupling**2) / (4*pi)  # using coupling = e * epsilon if you want a dark photon
+    return prefactor * (1 - x + x**2 / 3) / ((ma**2 * (1-x) / x) + x * M_E**2)
 
 
 
@@ -298,14 +507,8 @@ def brem_dsigma_dea_vector(Ea, Ee, coupling, ma, z):
     # Vector bremsstrahlung from an electron/positron beam with energy Ee
     # gives dsigma/dEa in the IWW approximation where Ea is the outgoing vector energy [1712.05706]
     # takes vector coupling and mass ma, and target material proton number z
-    x = Ea / Ee
-    ln_el = log(184*power(z, -1/3))
-    ln_inel = log(1194*power(z, -2/3))
-
-    chi = z**2 * ln_el + z * ln_inel
-    
-    prefactor = chi * (4*ALPHA**2 * coupling**2) / (4*pi)  # using coupling = e * epsilon if you want a dark photon
-    return (1/Ee) * prefactor * (1 - x + x**2 / 3) / ((ma**2 * (1-x) / x) + x * M_E**2)
+    ln_el, ln_inel = _tsai_logs(z)
+    return (1/Ee) * _brem_dsigma_dx_vector_ufunc(Ea / Ee, coupling, ma, z**2 * ln_el + z * ln_inel)
 
 
 
@@ -314,17 +517,13 @@ def brem_dsigma_dx_vector(x, coupling, ma, z):
     # Vector bremsstrahlung from an electron/positron beam with energy Ee
     # gives dsigma/dx in the IWW approximation where Ea is the outgoing vector energy [1712.05706]
     # takes vector coupling and mass ma, and target material proton number z
-    ln_el = log(184*power(z, -1/3))
-    ln_inel = log(1194*power(z, -2/3))
-
-    chi = z**2 * ln_el + z * ln_inel
-    
-    prefactor = chi * (4*ALPHA**2 * coupling**2) / (4*pi)  # using coupling = e * epsilon if you want a dark photon
-    return prefactor * (1 - x + x**2 / 3) / ((ma**2 * (1-x) / x) + x * M_E**2)
+    ln_el, ln_inel = _tsai_logs(z)
+    return _brem_dsigma_dx_vector_ufunc(x, coupling, ma, z**2 * ln_el + z * ln_inel)
 
 
 
 
+@njit(cache=True, fastmath=True, error_model="numpy")
 def dsig_dEv_dcostheta_vector_brem_etl(Ev, costheta, ttilde, Ebeam, mV, MTarget, ZTarget, ATarget):
     #Exact Tree-Level Dark Photon Bremsstrahlung  
     #e (ep) + Z -> e (epp) + V (w) + Z
@@ -333,13 +532,16 @@ def dsig_dEv_dcostheta_vector_brem_etl(Ev, costheta, ttilde, Ebeam, mV, MTarget,
     x = Ev
     Jacobian = 1.0/Ebeam
 
+    tconv = (2*MTarget*(MTarget + Ebeam)*math.sqrt(Ebeam**2 + M_E**2)/(MTarget*(MTarget+2*Ebeam) + M_E**2))**2
+    t = ttilde*tconv
+
     # kinematic boundaries
     if x*Ebeam < mV:
         return 0.
     
-    k = np.sqrt((x * Ebeam)**2 - mV**2)
-    p = np.sqrt(Ebeam**2 - M_E**2)
-    V = np.sqrt(p**2 + k**2 - 2*p*k*costheta)
+    k = math.sqrt((x * Ebeam)**2 - mV**2)
+    p = math.sqrt(Ebeam**2 - M_E**2)
+    V = math.sqrt(p**2 + k**2 - 2*p*k*costheta)
     
     
     utilde = -2 * (x*Ebeam**2 - k*p*costheta) + mV**2
@@ -349,33 +551,34 @@ def dsig_dEv_dcostheta_vector_brem_etl(Ev, costheta, ttilde, Ebeam, mV, MTarget,
     if discr < 0:
         return 0.
         
-    Qplus = V * (utilde + 2*MTarget*((1-x)*Ebeam + MTarget)) + ((1-x)*Ebeam + MTarget) * np.sqrt(discr)
+    Qplus = V * (utilde + 2*MTarget*((1-x)*Ebeam + MTarget)) + ((1-x)*Ebeam + MTarget) * math.sqrt(discr)
     Qplus = Qplus/(2*((1-x)*Ebeam + MTarget)**2-2*V**2)
     
-    Qminus = V * (utilde + 2*MTarget*((1-x)*Ebeam + MTarget)) - ((1-x)*Ebeam + MTarget) * np.sqrt(discr)
+    Qminus = V * (utilde + 2*MTarget*((1-x)*Ebeam + MTarget)) - ((1-x)*Ebeam + MTarget) * math.sqrt(discr)
     Qminus = Qminus/(2*((1-x)*Ebeam + MTarget)**2-2*V**2)
     
-    Qplus = np.fabs(Qplus)
-    Qminus = np.fabs(Qminus)
+    Qplus = abs(Qplus)
+    Qminus = abs(Qminus)
     
-    tplus = 2*MTarget*(np.sqrt(MTarget**2 + Qplus**2) - MTarget)
-    tminus = 2*MTarget*(np.sqrt(MTarget**2 + Qminus**2) - MTarget)
+    tplus = 2*MTarget*(math.sqrt(MTarget**2 + Qplus**2) - MTarget)
+    tminus = 2*MTarget*(math.sqrt(MTarget**2 + Qminus**2) - MTarget)
 
     # Physical region checks
     if tplus < tminus:
         return 0.
     
-    tconv = (2*MTarget*(MTarget + Ebeam)*np.sqrt(Ebeam**2 + M_E**2)/(MTarget*(MTarget+2*Ebeam) + M_E**2))**2
-    t = ttilde*tconv
     if t > tplus or t < tminus:
         return 0.
             
     q0 = -t/(2*MTarget)
-    q = np.sqrt(t**2/(4*MTarget**2)+t)
+    q = math.sqrt(t**2/(4*MTarget**2)+t)
+    # q = 0 (ttilde = 0) leaves costhetaq undefined; no physical contribution
+    if q == 0.:
+        return 0.
     costhetaq = -(V**2 + q**2 + M_E**2 -(Ebeam + q0 -x*Ebeam)**2)/(2*V*q)
 
     # kinematic boundaries
-    if np.fabs(costhetaq) > 1.:
+    if abs(costhetaq) > 1.:
         return 0.
     mVsq2mesq = (mV**2 + 2*M_E**2)
     Am2 = -8 * MTarget * (4*Ebeam**2 * MTarget - t*(2*Ebeam + MTarget)) * mVsq2mesq
@@ -384,19 +587,28 @@ def dsig_dEv_dcostheta_vector_brem_etl(Ev, costheta, ttilde, Ebeam, mV, MTarget,
     A0 = (8/utilde**2) * (MTarget**2 * (2*t*utilde + (t-4*Ebeam**2*(x-1)**2)*mVsq2mesq) + 2*Ebeam*MTarget*t*(utilde - (x-1)*mVsq2mesq))
     Y = -t + 2*q0*Ebeam - 2*q*p*(p - k*costheta)*costhetaq/V 
     W= Y**2 - 4*q**2 * p**2 * k**2 * (1 - costheta**2)*(1 - costhetaq**2)/V**2
-    
-    if W == 0.:
-        print("x, costheta, t = ", [x, costheta, t])
-        print("Y, q, p, k, costheta, costhetaq, V" ,[Y, q, p, k, costheta, costhetaq, V])
         
-    # kinematic boundaries
-    if W < 0:
+    # kinematic boundaries (W = 0 is a measure-zero singular point)
+    if W <= 0:
         return 0.
     
-    phi_integral = (A0 + Y*A1 + Am1/np.sqrt(W) + Y * Am2/W**1.5)/(8*MTarget**2)
+    phi_integral = (A0 + Y*A1 + Am1/math.sqrt(W) + Y * Am2/W**1.5)/(8*MTarget**2)
 
     formfactor_separate_over_tsquared = Gelastic_inelastic_over_tsquared(t, ZTarget, ATarget)
     
-    ans = formfactor_separate_over_tsquared*np.power(ALPHA, 3) * k * Ebeam * phi_integral/(p*np.sqrt(k**2 + p**2 - 2*p*k*costheta))
+    ans = formfactor_separate_over_tsquared*ALPHA**3 * k * Ebeam * phi_integral/(p*math.sqrt(k**2 + p**2 - 2*p*k*costheta))
     
-    return(ans*tconv*Jacobian)
\ No newline at end of file
+    return(ans*tconv*Jacobian)
+
+
+
+
+@njit(parallel=True, cache=True, fastmath=True, error_model="numpy")
+def dsig_dEv_dcostheta_vector_brem_etl_batched(Ev, costheta, ttilde, Ebeam, mV, MTarget, ZTarget, ATarget):
+    # Batched dsig_dEv_dcostheta_vector_brem_etl over equal-length 1D arrays of (Ev, costheta, ttilde),
+    # e.g. a flattened meshgrid or a set of MC samples
+    n = Ev.shape[0]
+    out = np.zeros(n)
+    for i in prange(n):
+        out[i] = dsig_dEv_dcostheta_vector_brem_etl(Ev[i], costheta[i], ttilde[i], Ebeam, mV, MTarget, ZTarget, ATarget)
+    return out
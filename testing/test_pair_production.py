@@ -0,0 +1,95 @@
+import numpy as np
+
+from alplib.constants import *
+from alplib.fmath import log_gauss_legendre_rule
+from alplib.materials import Material
+from alplib.matrix_element import M2PairProduction
+from alplib.det_xs import pair_production_sigma
+
+
+def m2_from_sub_elements(m2, Ea, Ep, tp, tm, phi, coupling):
+    # reference |M|^2 built from M2PairProduction.sub_elements with numpy kinematics
+    c1, c2, s1, s2, cphi = np.cos(tp), np.cos(tm), np.sin(tp), np.sin(tm), np.cos(phi)
+    p1 = np.sqrt(Ep**2 - M_E**2)
+    Em = Ea - Ep
+    p2 = np.sqrt(Em**2 - M_E**2)
+    k = np.sqrt(Ea**2 - m2.ma**2)
+
+    p1_dot_p2 = p1*p2*(s1*s2*cphi + c1*c2)
+    l2_dot_k = k**2 - k*p1*c1 - k*p2*c2
+    l2_dot_p1 = k*p1*c1 - M_E**2 - p1_dot_p2
+    l2_dot_p2 = k*p2*c2 - M_E**2 - p1_dot_p2
+
+    kp1 = Ea*Ep - k*p1*c1
+    kp2 = Ea*Em - k*p2*c2
+    kl1 = Ea*m2.mN
+    kl2 = Ea*m2.mN - l2_dot_k
+    p1p2 = Ep*Em - p1_dot_p2
+    p1l1 = Ep*m2.mN
+    p2l1 = Em*m2.mN
+    p1l2 = Ep*m2.mN - l2_dot_p1
+    p2l2 = Em*m2.mN - l2_dot_p2
+
+    m1_2, m2_2, m2_m1 = m2.sub_elements(kp1, kp2, kl1, kl2, p1p2, p1l1, p2l1, p1l2, p2l2, case="alp")
+
+    q2 = m2.ma**2 + 2*M_E**2 - 2*kp1 - 2*kp2 + 2*p1p2
+    propagator1 = q2*(m2.ma**2 - 2*kp1)
+    propagator2 = q2*(m2.ma**2 - 2*kp2)
+    prefactor = (4*np.pi*ALPHA*coupling)**2 * m2.ff2(np.sqrt(np.abs(q2)))
+    return prefactor * (m1_2 / propagator1**2 + m2_2 / propagator2**2 + 2 * m2_m1 / (propagator2*propagator1))
+
+
+def test_m2_alp_matches_sub_elements():
+    rng = np.random.default_rng(42)
+    n = 2000
+    for ma in [1e-3, 0.1, 1.0]:
+        m2 = M2PairProduction(ma, 72.63*M_P, 41, 32)
+        Ea = 10.0
+        Ep = M_E + (Ea - 2*M_E)*rng.uniform(0.01, 0.99, n)
+        tp = 10**rng.uniform(-6, -1, n)
+        tm = 10**rng.uniform(-6, -1, n)
+        phi = 2*np.pi*rng.uniform(size=n)
+
+        kernel = m2.m2(Ea, Ep, tp, tm, phi, coupling=1e-3, case="alp")
+        reference = m2_from_sub_elements(m2, Ea, Ep, tp, tm, phi, 1e-3)
+        np.testing.assert_allclose(kernel, reference, rtol=1e-8)
+
+
+
+def pair_production_sigma_grid(Ea, ma, ge, mat, n_t=8, n_phi=16, n_ep=16):
+    # reference: tensor-product Gauss-Legendre over (tp, tm, phi, ep), log-spaced panels in the angles
+    m2 = M2PairProduction(ma, mat.m[0], mat.n[0], mat.z[0])
+    t, w_t = log_gauss_legendre_rule(1e-15, 1e-5, n=n_t)
+    x, w = np.polynomial.legendre.leggauss(n_phi)
+    phi, w_phi = np.pi*(x + 1), np.pi*w
+    x, w = np.polynomial.legendre.leggauss(n_ep)
+    ep, w_ep = M_E + 0.5*(Ea - 2*M_E)*(x + 1), 0.5*(Ea - 2*M_E)*w
+
+    tp, tm, phi, ep = np.meshgrid(t, t, phi, ep, indexing="ij")
+    wgts = np.einsum("i,j,k,l->ijkl", w_t, w_t, w_phi, w_ep)
+    p1 = np.sqrt(ep**2 - M_E**2)
+    p2 = np.sqrt((Ea - ep)**2 - M_E**2)
+    m2_wgts = m2.m2(Ea, ep.ravel(), tp.ravel(), tm.ravel(), phi.ravel(), coupling=ge).reshape(tp.shape)
+    va = np.sqrt(Ea**2 - ma**2)/Ea
+    return np.sum(wgts * np.abs(m2_wgts) * p1*p2*np.sin(tp)*np.sin(tm)) / (512*np.pi**4*Ea*va*mat.m[0]**2)
+
+
+def test_pair_production_sigma_stable_across_sobol_repeats():
+    mat = Material("Ar")
+    sigmas = np.array([pair_production_sigma(100.0, 1e-3, 1e-3, mat, n_samples=2**16) for _ in range(8)])
+    assert np.all(sigmas > 0.0)
+    assert np.std(sigmas) / np.mean(sigmas) < 0.03
+
+
+def test_pair_production_sigma_scales_as_ge_squared():
+    mat = Material("Ar")
+    sigma_1 = pair_production_sigma(100.0, 1e-3, 1e-3, mat, n_samples=2**18)
+    sigma_2 = pair_production_sigma(100.0, 1e-3, 2e-3, mat, n_samples=2**18)
+    np.testing.assert_allclose(sigma_2 / sigma_1, 4.0, rtol=0.02)
+
+
+def test_pair_production_sigma_matches_grid_reference():
+    mat = Material("Ar")
+    for Ea, ma in [(100.0, 1e-3), (10.0, 0.1)]:
+        sigma = pair_production_sigma(Ea, ma, 1e-3, mat, n_samples=2**18)
+        np.testing.assert_allclose(sigma, pair_production_sigma_grid(Ea, ma, 1e-3, mat), rtol=0.02)
@@ -0,0 +1,43 @@
+import numpy as np
+import mpmath as mp
+
+from alplib.constants import *
+from alplib.materials import Material
+from alplib.prod_xs import PrimakoffSigmaFF, primakoff_nsigma
+
+from scipy.integrate import quad
+
+
+def primakoff_nsigma_mp(energy, z, ma, g):
+    # reference: the original cos(theta) integrand integrated in 80-digit arithmetic, split per decade of theta
+    with mp.workdps(80):
+        energy, ma = mp.mpf(energy), mp.mpf(ma)
+        pa = mp.sqrt(energy**2 - ma**2)
+        def dsigma_dtheta(theta):
+            t = 2*energy*(pa*mp.cos(theta) - energy) + ma**2
+            return ALPHA * (g * z * pa**2 / t)**2 * mp.sin(theta)**3 / 4
+        return float(mp.quad(dsigma_dtheta, [mp.mpf(10)**k for k in range(-30, 1)] + [mp.pi]))
+
+
+def test_primakoff_nsigma_matches_mp_reference():
+    for ma in [1e-6, 1e-3, 0.1]:
+        for energy in [1.0, 100.0]:
+            sigma = primakoff_nsigma(energy, 32, ma, 1e-3)
+            assert np.isfinite(sigma)
+            np.testing.assert_allclose(sigma, primakoff_nsigma_mp(energy, 32, ma, 1e-3), rtol=1e-10)
+
+
+def test_primakoff_sigma_ff_matches_quad():
+    for mat_name in ["W", "C"]:
+        prim = PrimakoffSigmaFF(Material(mat_name))
+        for egamma in [1.0, 100.0, 1000.0]:
+            for ma in [1e-3, 0.1]:
+                s = 2*egamma*prim.M + prim.M**2
+                tmin, tmax = prim.t_bounds(egamma, ma)
+                # adaptive reference in u = log(-t), where the forward peak at tmax is resolved
+                reference = quad(lambda u: np.exp(u)*prim.dsigma_dt(-np.exp(u), s, ma, prim.M, 1e-3),
+                                 np.log(-tmax), np.log(-tmin), limit=500, epsabs=0, epsrel=1e-10)[0]
+                np.testing.assert_allclose(prim(egamma, ma, 1e-3), reference, rtol=1e-6)
+        # below the production threshold s < (M + ma)^2
+        assert prim(0.01, 0.1, 1e-3) == 0.0
+        assert prim(0.1, 0.1, 1e-3) == 0.0